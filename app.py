@@ -6,10 +6,13 @@ With Kimley-Horn header and footer
 
 import streamlit as st
 from datetime import date
+from typing import NamedTuple, Optional
 from io import BytesIO
+from copy import deepcopy
 from docx import Document
 from docx.shared import Inches, Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.table import WD_ROW_HEIGHT_RULE, WD_CELL_VERTICAL_ALIGNMENT
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
@@ -18,75 +21,103 @@ from docx.oxml.ns import qn
 # TASK DESCRIPTIONS DATABASE
 # ============================================================================
 
-DEFAULT_FEES = {
-    '110': {'name': 'Civil Engineering Design', 'amount': 40000, 'type': 'Hourly, Not-to-Exceed'},
-    '120': {'name': 'Civil Schematic Design', 'amount': 35000, 'type': 'Hourly, Not-to-Exceed'},
-    '130': {'name': 'Civil Design Development', 'amount': 45000, 'type': 'Hourly, Not-to-Exceed'},
-    '140': {'name': 'Civil Construction Documents', 'amount': 50000, 'type': 'Hourly, Not-to-Exceed'},
-    '150': {'name': 'Civil Permitting', 'amount': 40000, 'type': 'Hourly, Not-to-Exceed'},
-    '210': {'name': 'Meetings and Coordination', 'amount': 20000, 'type': 'Hourly, Not-to-Exceed'},
-    '310': {'name': 'Civil Construction Phase Services', 'amount': 35000, 'type': 'Lump Sum'}
-}
+@st.cache_resource(show_spinner=False)
+def get_default_fees():
+    """Default name, fee and fee type for each task. Shared and read-only."""
+    return {
+        '110': {'name': 'Civil Engineering Design', 'amount': 40000, 'type': 'Hourly, Not-to-Exceed'},
+        '120': {'name': 'Civil Schematic Design', 'amount': 35000, 'type': 'Hourly, Not-to-Exceed'},
+        '130': {'name': 'Civil Design Development', 'amount': 45000, 'type': 'Hourly, Not-to-Exceed'},
+        '140': {'name': 'Civil Construction Documents', 'amount': 50000, 'type': 'Hourly, Not-to-Exceed'},
+        '150': {'name': 'Civil Permitting', 'amount': 40000, 'type': 'Hourly, Not-to-Exceed'},
+        '210': {'name': 'Meetings and Coordination', 'amount': 20000, 'type': 'Hourly, Not-to-Exceed'},
+        '310': {'name': 'Civil Construction Phase Services', 'amount': 35000, 'type': 'Lump Sum'}
+    }
 
-TASK_DESCRIPTIONS = {
-    '110': [
-        "Kimley-Horn will prepare an onsite drainage report with supporting calculations showing the proposed development plan is consistent with the Southwest Florida Water Management District Basis of Review. This design will account for the stormwater design to support the development of the project site. The drainage report will include limited stormwater modeling to demonstrate that the Lot A site development will maintain the existing discharge rate and provide the required stormwater attenuation.",
-        "The onsite drainage report will include calculations for 25-year 24-hour and 100-year 24-hour design storm conditions in accordance with Southwest Florida Water Management District Guidelines. A base stormwater design will be provided for the project site showing reasonable locations for stormwater conveyance features and stormwater management pond sizing."
-    ],
-    '120': [
-        "Kimley-Horn will prepare Civil Schematic Design deliverables in accordance with the Client's Design Project Deliverables Checklist. For the Civil Schematic Design task, the deliverables that Kimley-Horn will provide consist of Civil Site Plan, Establish Finish Floor Elevations, Utility Will Serve Letters and Points of Service, Utility Routing and Easement Requirements."
-    ],
-    '130': [
-        "Upon Client approval of the Schematic Design task, Kimley-Horn will prepare Design Development Plans of the civil design in accordance with the Client's Design Project Deliverables Checklist for Civil Design Development Deliverables. These documents will be approximately 50% complete and will include detail for City code review and preliminary pricing but will not include enough detail for construction bidding."
-    ],
-    '140': [
-        "Based on the approved Development Plan, Kimley-Horn will provide engineering and design services for the preparation of site construction plans for on-site improvements.",
-        "Cover Sheet",
-        "The cover sheet includes plan contents, vicinity map, legal description and team identification.",
-        "Existing Conditions Plan/Demolition Plan",
-        "This sheet will include and identify the required demolition of the existing items on the project site.",
-        "Site Layout Plan",
-        "This sheet will include building setback lines, property lines, outline of building footprint, parking areas, handicap access ramps, sidewalks, crosswalks, driveways, and traffic lanes.",
-        "Grading and Drainage Plan",
-        "This sheet will include existing and proposed spot elevations and contours, building finish floor elevations, parking area drainage patterns, and stormwater inlet and pipe locations and sizes.",
-        "**NOTE:** Any structural retaining walls are not included with this scope and shall be designed and permitted by others.",
-        "Utility Plan",
-        "This sheet will show the location and size of all water, sanitary sewer and reclaimed water facilities required to serve the development.",
-        "**NOTE:** Kimley-Horn's contract does not include the design of the fire lines from the designated point of service (P.O.S.) up to 1' above the building foundation.",
-        "Erosion and Sediment Control Plan",
-        "This sheet will include erosion and sediment control measures designed to be implemented during construction.",
-        "Details",
-        "Standard and modified typical construction details will be provided.",
-        "**NOTE:** A specifications package is not included in this scope of services as specifications are per authority having jurisdiction (AHJ)."
-    ],
-    '150': [
-        "Prepare and submit on the Client's behalf the following permitting packages for review/approval of construction documents, and attend meetings required to obtain the following Agency approvals:",
-        "Southwest Florida Water Management District Environmental Resource Permit – Minor Modification",
-        "City of Tampa Water Department Commitment / Construction Plan Approval",
-        "Hillsborough County Environmental Protection Commission",
-        "Kimley-Horn will coordinate with the City of Tampa Development Review and coordination with the Florida Department of Transportation and the Hillsborough County departments as needed to obtain the necessary regulatory and utility approval of the site plans and associated drainage facilities. We will assist the Client with meetings necessary to gain site plan approval.",
-        "This scope does not anticipate a Geotechnical or Environmental Assessment Report, Survey, Topographic Survey, or Arborist Report be required for this permit application.",
-        "It is assumed Client will provide the needed information regarding the development program and requirements. Kimley-Horn will work with the Owner and their team to integrate the necessary design requirements into the Civil design to support entitlement, platting, and development approvals.",
-        "These permit applications will be submitted using the electronic permitting submittal system (web-based system) for the respective jurisdictions where applicable."
-    ],
-    '210': [
-        "Kimley-Horn will be available to provide miscellaneous project support at the direction of the Client. This task may include design meetings, additional permit support, permit research, or other miscellaneous tasks associated with the initial and future development of the project site. This task will also cover tasks such as design coordination meetings, scheduling, coordination with other client consultants, responses to additional rounds of agency comments."
-    ],
-    '310': [
-        "Engineering construction phase services will be performed in connection with site improvements designed by Kimley-Horn. The scope of this task assumes construction phase services will be performed concurrent and in coordination with one General Contractor for the entire project. This task does not include constructing the project in multiple phases. Kimley-Horn construction phase services will include the following:",
-        "Provide for review of shop drawings and submittals required for the site improvements controlled by our design documents. Kimley-Horn has included up to {shop_drawing_hours} hours for review of shop drawings and samples.",
-        "Review and reply to Contractor's request(s) for information during construction phase. Kimley-Horn has included up to {rfi_hours} hours for response to RFI's.",
-        "Attendance at up to {oac_meetings} one-hour each Owner-Architect-Contractor (OAC) virtual meetings.",
-        "Kimley-Horn will visit the construction site during the duration of construction for an estimated total of up to {site_visits} site visits at two-hours each to observe the progress of the civil components of work completed.",
-        "Provide up to two (2) reviews of 'as-built' documents, submitted by General Contractor's registered land surveyor.",
-        "Kimley-Horn will prepare Record Drawings for potable water and sanitary sewer only. Kimley-Horn has included up to {record_drawing_hours} hours for record drawing preparation.",
-        "Kimley-Horn will submit FDEP water and sewer clearance submittals based on as-built information provided by the Contractor.",
-        "Kimley-Horn shall submit a Letter of General Compliance for the civil related components of construction to the AHJ.",
-        "Submit Certification of Completion to the Water Management District (WMD).",
-        "The above hours allocated to the respective construction phase services may be interchangeable amongst the construction phase services outlined in this task, however the total number of hours included within the entirety of the task is up to {total_hours} hours."
-    ]
+# Task numbers in document order
+ORDERED_TASK_NUMS = tuple(sorted(get_default_fees()))
+
+# Scope-of-services heading for each task, e.g. 'Task 140 – Construction Documents'
+TASK_HEADINGS = {
+    task_num: f"Task {task_num} – {task['name'].replace('Civil ', '')}"
+    for task_num, task in get_default_fees().items()
 }
 
+
+@st.cache_resource(show_spinner=False)
+def get_task_descriptions():
+    """Scope paragraphs for each task. Shared and read-only."""
+    return {
+        '110': [
+            "Kimley-Horn will prepare an onsite drainage report with supporting calculations showing the proposed development plan is consistent with the Southwest Florida Water Management District Basis of Review. This design will account for the stormwater design to support the development of the project site. The drainage report will include limited stormwater modeling to demonstrate that the Lot A site development will maintain the existing discharge rate and provide the required stormwater attenuation.",
+            "The onsite drainage report will include calculations for 25-year 24-hour and 100-year 24-hour design storm conditions in accordance with Southwest Florida Water Management District Guidelines. A base stormwater design will be provided for the project site showing reasonable locations for stormwater conveyance features and stormwater management pond sizing."
+        ],
+        '120': [
+            "Kimley-Horn will prepare Civil Schematic Design deliverables in accordance with the Client's Design Project Deliverables Checklist. For the Civil Schematic Design task, the deliverables that Kimley-Horn will provide consist of Civil Site Plan, Establish Finish Floor Elevations, Utility Will Serve Letters and Points of Service, Utility Routing and Easement Requirements."
+        ],
+        '130': [
+            "Upon Client approval of the Schematic Design task, Kimley-Horn will prepare Design Development Plans of the civil design in accordance with the Client's Design Project Deliverables Checklist for Civil Design Development Deliverables. These documents will be approximately 50% complete and will include detail for City code review and preliminary pricing but will not include enough detail for construction bidding."
+        ],
+        '140': [
+            "Based on the approved Development Plan, Kimley-Horn will provide engineering and design services for the preparation of site construction plans for on-site improvements.",
+            "Cover Sheet",
+            "The cover sheet includes plan contents, vicinity map, legal description and team identification.",
+            "Existing Conditions Plan/Demolition Plan",
+            "This sheet will include and identify the required demolition of the existing items on the project site.",
+            "Site Layout Plan",
+            "This sheet will include building setback lines, property lines, outline of building footprint, parking areas, handicap access ramps, sidewalks, crosswalks, driveways, and traffic lanes.",
+            "Grading and Drainage Plan",
+            "This sheet will include existing and proposed spot elevations and contours, building finish floor elevations, parking area drainage patterns, and stormwater inlet and pipe locations and sizes.",
+            "**NOTE:** Any structural retaining walls are not included with this scope and shall be designed and permitted by others.",
+            "Utility Plan",
+            "This sheet will show the location and size of all water, sanitary sewer and reclaimed water facilities required to serve the development.",
+            "**NOTE:** Kimley-Horn's contract does not include the design of the fire lines from the designated point of service (P.O.S.) up to 1' above the building foundation.",
+            "Erosion and Sediment Control Plan",
+            "This sheet will include erosion and sediment control measures designed to be implemented during construction.",
+            "Details",
+            "Standard and modified typical construction details will be provided.",
+            "**NOTE:** A specifications package is not included in this scope of services as specifications are per authority having jurisdiction (AHJ)."
+        ],
+        '150': [
+            "Prepare and submit on the Client's behalf the following permitting packages for review/approval of construction documents, and attend meetings required to obtain the following Agency approvals:",
+            "Southwest Florida Water Management District Environmental Resource Permit – Minor Modification",
+            "City of Tampa Water Department Commitment / Construction Plan Approval",
+            "Hillsborough County Environmental Protection Commission",
+            "Kimley-Horn will coordinate with the City of Tampa Development Review and coordination with the Florida Department of Transportation and the Hillsborough County departments as needed to obtain the necessary regulatory and utility approval of the site plans and associated drainage facilities. We will assist the Client with meetings necessary to gain site plan approval.",
+            "This scope does not anticipate a Geotechnical or Environmental Assessment Report, Survey, Topographic Survey, or Arborist Report be required for this permit application.",
+            "It is assumed Client will provide the needed information regarding the development program and requirements. Kimley-Horn will work with the Owner and their team to integrate the necessary design requirements into the Civil design to support entitlement, platting, and development approvals.",
+            "These permit applications will be submitted using the electronic permitting submittal system (web-based system) for the respective jurisdictions where applicable."
+        ],
+        '210': [
+            "Kimley-Horn will be available to provide miscellaneous project support at the direction of the Client. This task may include design meetings, additional permit support, permit research, or other miscellaneous tasks associated with the initial and future development of the project site. This task will also cover tasks such as design coordination meetings, scheduling, coordination with other client consultants, responses to additional rounds of agency comments."
+        ],
+        '310': [
+            "Engineering construction phase services will be performed in connection with site improvements designed by Kimley-Horn. The scope of this task assumes construction phase services will be performed concurrent and in coordination with one General Contractor for the entire project. This task does not include constructing the project in multiple phases. Kimley-Horn construction phase services will include the following:",
+            "Provide for review of shop drawings and submittals required for the site improvements controlled by our design documents. Kimley-Horn has included up to {shop_drawing_hours} hours for review of shop drawings and samples.",
+            "Review and reply to Contractor's request(s) for information during construction phase. Kimley-Horn has included up to {rfi_hours} hours for response to RFI's.",
+            "Attendance at up to {oac_meetings} one-hour each Owner-Architect-Contractor (OAC) virtual meetings.",
+            "Kimley-Horn will visit the construction site during the duration of construction for an estimated total of up to {site_visits} site visits at two-hours each to observe the progress of the civil components of work completed.",
+            "Provide up to two (2) reviews of 'as-built' documents, submitted by General Contractor's registered land surveyor.",
+            "Kimley-Horn will prepare Record Drawings for potable water and sanitary sewer only. Kimley-Horn has included up to {record_drawing_hours} hours for record drawing preparation.",
+            "Kimley-Horn will submit FDEP water and sewer clearance submittals based on as-built information provided by the Contractor.",
+            "Kimley-Horn shall submit a Letter of General Compliance for the civil related components of construction to the AHJ.",
+            "Submit Certification of Completion to the Water Management District (WMD).",
+            "The above hours allocated to the respective construction phase services may be interchangeable amongst the construction phase services outlined in this task, however the total number of hours included within the entirety of the task is up to {total_hours} hours."
+        ]
+    }
+
+
+# Scope paragraphs rendered as underlined sub-section headings (lowercase)
+SUBSECTION_HEADINGS = frozenset({
+    'cover sheet',
+    'existing conditions plan/demolition plan',
+    'site layout plan',
+    'grading and drainage plan',
+    'utility plan',
+    'erosion and sediment control plan',
+    'details'
+})
+
 # ============================================================================
 # PERMIT CONFIGURATION BY COUNTY
 # ============================================================================
@@ -237,6 +268,91 @@ def lookup_property_info(county, parcel_id):
 # DOCUMENT GENERATION FUNCTIONS
 # ============================================================================
 
+_PT0, _PT8, _PT10, _PT11, _PT28 = Pt(0), Pt(8), Pt(10), Pt(11), Pt(28)
+_INDENT_0_25IN = Inches(0.25)
+_MARGIN_1IN = Inches(1.0)
+
+# Paragraph style (Arial 10pt, single spaced, no space after) for the letter block
+LETTER_STYLE = 'Proposal Letter'
+
+
+def _styled_run(para, text, size=_PT10, bold=False, underline=False, italic=False):
+    """Add an Arial run to a paragraph, setting only the font attributes needed."""
+    run = para.add_run(text)
+    font = run.font
+    font.name = 'Arial'
+    font.size = size
+    if bold:
+        font.bold = True
+    if underline:
+        font.underline = True
+    if italic:
+        font.italic = True
+    return run
+
+
+_BLANK_P = OxmlElement('w:p')
+
+
+def _append_blank(body):
+    """Append an empty spacer paragraph."""
+    body.insert_element_before(deepcopy(_BLANK_P), 'w:sectPr')
+
+
+def _fast_para(body, text, bold=False, underline=False, italic=False):
+    """
+    Append a justified, single-run Arial 10pt paragraph by building its XML directly.
+    Same output as doc.add_paragraph() + _styled_run() with no space after and
+    single line spacing, minus the python-docx proxy overhead. Keep the two in
+    sync. Plain text only (no tabs or line breaks).
+    """
+    if '\t' in text or '\n' in text:
+        raise ValueError('_fast_para does not support tabs or line breaks; use _styled_run')
+    
+    p = OxmlElement('w:p')
+    
+    pPr = OxmlElement('w:pPr')
+    spacing = OxmlElement('w:spacing')
+    spacing.set(qn('w:after'), '0')
+    spacing.set(qn('w:line'), '240')
+    spacing.set(qn('w:lineRule'), 'auto')
+    pPr.append(spacing)
+    jc = OxmlElement('w:jc')
+    jc.set(qn('w:val'), 'both')
+    pPr.append(jc)
+    p.append(pPr)
+    
+    r = OxmlElement('w:r')
+    rPr = OxmlElement('w:rPr')
+    fonts = OxmlElement('w:rFonts')
+    fonts.set(qn('w:ascii'), 'Arial')
+    fonts.set(qn('w:hAnsi'), 'Arial')
+    rPr.append(fonts)
+    if bold:
+        rPr.append(OxmlElement('w:b'))
+    if italic:
+        rPr.append(OxmlElement('w:i'))
+    sz = OxmlElement('w:sz')
+    sz.set(qn('w:val'), '20')
+    rPr.append(sz)
+    if underline:
+        u = OxmlElement('w:u')
+        u.set(qn('w:val'), 'single')
+        rPr.append(u)
+    r.append(rPr)
+    
+    t = OxmlElement('w:t')
+    t.text = text
+    if text != text.strip():
+        t.set(qn('xml:space'), 'preserve')
+    r.append(t)
+    p.append(r)
+    
+    # Paragraphs must stay ahead of the trailing section properties
+    body.insert_element_before(p, 'w:sectPr')
+    return p
+
+
 def set_cell_background(cell, color_hex):
     """Set cell background color."""
     tc = cell._tc
@@ -313,19 +429,19 @@ def create_header(section):
     logo_para.clear()
     
     run1 = logo_para.add_run("Kimley")
-    run1.font.size = Pt(28)
+    run1.font.size = _PT28
     run1.font.bold = False
     run1.font.color.rgb = RGBColor(88, 89, 91)
     run1.font.name = 'Arial Narrow'
     
     run2 = logo_para.add_run("»")
-    run2.font.size = Pt(28)
+    run2.font.size = _PT28
     run2.font.bold = False
     run2.font.color.rgb = RGBColor(88, 89, 91)
     run2.font.name = 'Arial Narrow'
     
     run3 = logo_para.add_run("Horn")
-    run3.font.size = Pt(28)
+    run3.font.size = _PT28
     run3.font.bold = False
     run3.font.color.rgb = RGBColor(166, 25, 46)
     run3.font.name = 'Arial Narrow'
@@ -335,10 +451,7 @@ def create_header(section):
     page_para = page_cell.paragraphs[0]
     page_para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
     
-    run = page_para.add_run('Page ')
-    run.font.name = 'Arial'
-    run.font.size = Pt(11)
-    run.font.italic = True
+    run = _styled_run(page_para, 'Page ', size=_PT11, italic=True)
     run.font.color.rgb = RGBColor(0, 0, 0)
     
     fldChar1 = OxmlElement('w:fldChar')
@@ -382,97 +495,48 @@ def create_footer(section):
         
         if texts[idx]:
             para = cell.paragraphs[0]
-            para.paragraph_format.space_before = Pt(0)
-            para.paragraph_format.space_after = Pt(0)
+            para.paragraph_format.space_before = _PT0
+            para.paragraph_format.space_after = _PT0
             para.paragraph_format.alignment = WD_ALIGN_PARAGRAPH.CENTER
             para.clear()
             
-            run = para.add_run(texts[idx])
-            run.font.name = 'Arial'
-            run.font.size = Pt(8)
+            run = _styled_run(para, texts[idx], size=_PT8)
             run.font.color.rgb = RGBColor(255, 255, 255)
 
 
 def add_opening_section(doc, client_info, project_info):
     """Add opening section."""
     
-    date_para = doc.add_paragraph()
-    date_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    run = date_para.add_run(project_info['date'])
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
-    date_para.paragraph_format.space_after = Pt(0)
-    date_para.paragraph_format.line_spacing = 1.0
-    
-    doc.add_paragraph()
-    
-    para = doc.add_paragraph()
-    run = para.add_run(client_info['contact'])
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
-    para.paragraph_format.space_after = Pt(0)
-    para.paragraph_format.line_spacing = 1.0
-    
-    para = doc.add_paragraph()
-    run = para.add_run(client_info['name'])
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
-    para.paragraph_format.space_after = Pt(0)
-    para.paragraph_format.line_spacing = 1.0
+    # Letter block paragraphs take font, size and spacing from the style
+    letter_style = doc.styles[LETTER_STYLE]
     
-    para = doc.add_paragraph()
-    run = para.add_run(client_info['address1'])
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
-    para.paragraph_format.space_after = Pt(0)
-    para.paragraph_format.line_spacing = 1.0
+    date_para = doc.add_paragraph(project_info['date'], style=letter_style)
+    date_para.alignment = WD_ALIGN_PARAGRAPH.LEFT
     
-    para = doc.add_paragraph()
-    run = para.add_run(client_info['address2'])
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
-    para.paragraph_format.space_after = Pt(0)
-    para.paragraph_format.line_spacing = 1.0
+    _append_blank(doc.element.body)
     
-    doc.add_paragraph()
+    doc.add_paragraph(client_info['contact'], style=letter_style)
+    doc.add_paragraph(client_info['name'], style=letter_style)
+    doc.add_paragraph(client_info['address1'], style=letter_style)
+    doc.add_paragraph(client_info['address2'], style=letter_style)
     
-    para = doc.add_paragraph()
-    run = para.add_run('Re:\tProfessional Services Agreement')
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
-    para.paragraph_format.space_after = Pt(0)
-    para.paragraph_format.line_spacing = 1.0
+    _append_blank(doc.element.body)
     
-    para = doc.add_paragraph()
-    run = para.add_run(f'\t{project_info["name"]}')
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
-    para.paragraph_format.space_after = Pt(0)
-    para.paragraph_format.line_spacing = 1.0
+    doc.add_paragraph('Re:\tProfessional Services Agreement', style=letter_style)
+    doc.add_paragraph(f'\t{project_info["name"]}', style=letter_style)
     
-    doc.add_paragraph()
+    _append_blank(doc.element.body)
     
-    para = doc.add_paragraph()
-    run = para.add_run(f'Dear {client_info["contact"].split()[0]} {client_info["contact"].split()[-1]}:')
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
-    run.font.bold = False  # NOT bold
-    para.paragraph_format.space_after = Pt(0)
-    para.paragraph_format.line_spacing = 1.0
+    doc.add_paragraph(f'Dear {client_info["contact"].split()[0]} {client_info["contact"].split()[-1]}:', style=letter_style)
     
-    doc.add_paragraph()
+    _append_blank(doc.element.body)
     
-    para = doc.add_paragraph()
+    para = doc.add_paragraph(style=letter_style)
     opening_text = f'Kimley-Horn and Associates, Inc. ("Kimley-Horn" or "Consultant") is pleased to submit this Professional Services Agreement ("Agreement") to {client_info["name"]} ("Client") for professional services for the {project_info["name"]} ("Project").'
-    run = para.add_run(opening_text)
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
-    run.font.bold = True
+    para.add_run(opening_text).bold = True
     para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    para.paragraph_format.space_after = Pt(0)
-    para.paragraph_format.line_spacing = 1.0
     
-    doc.add_paragraph()
+    _append_blank(doc.element.body)
 
 
 def add_project_understanding(doc, project_description, assumptions):
@@ -480,60 +544,49 @@ def add_project_understanding(doc, project_description, assumptions):
     
     # Section heading - BOLD + CENTERED
     para = doc.add_paragraph()
-    run = para.add_run('PROJECT UNDERSTANDING')
-    run.font.name = 'Arial'
-    run.font.size = Pt(11)
-    run.font.bold = True  # BOLD
+    _styled_run(para, 'PROJECT UNDERSTANDING', size=_PT11, bold=True)
     para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    para.paragraph_format.space_after = Pt(0)
+    para.paragraph_format.space_after = _PT0
     para.paragraph_format.line_spacing = 1.0
     
-    doc.add_paragraph()
+    _append_blank(doc.element.body)
     
     # Project description - JUSTIFIED
     para = doc.add_paragraph()
-    run = para.add_run(project_description)
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
+    _styled_run(para, project_description)
     para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    para.paragraph_format.space_after = Pt(0)
+    para.paragraph_format.space_after = _PT0
     para.paragraph_format.line_spacing = 1.0
     
-    doc.add_paragraph()
+    _append_blank(doc.element.body)
     
     # Assumptions intro
     para = doc.add_paragraph()
-    run = para.add_run('Kimley-Horn understands the following in preparing this proposal:')
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
+    _styled_run(para, 'Kimley-Horn understands the following in preparing this proposal:')
     para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    para.paragraph_format.space_after = Pt(0)
+    para.paragraph_format.space_after = _PT0
     para.paragraph_format.line_spacing = 1.0
     
-    doc.add_paragraph()
+    _append_blank(doc.element.body)
     
     # Assumptions as bullet points
     for assumption in assumptions:
         para = doc.add_paragraph(style='List Bullet')
-        run = para.add_run(assumption)
-        run.font.name = 'Arial'
-        run.font.size = Pt(10)
+        _styled_run(para, assumption)
         para.alignment = WD_ALIGN_PARAGRAPH.LEFT
-        para.paragraph_format.space_after = Pt(0)
+        para.paragraph_format.space_after = _PT0
         para.paragraph_format.line_spacing = 1.0
     
-    doc.add_paragraph()
+    _append_blank(doc.element.body)
     
     # Closing statement
     para = doc.add_paragraph()
-    run = para.add_run('If any of these assumptions are not correct, then the scope and fee will change. Based on the above understanding, Kimley-Horn proposes the following scope of services:')
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
+    _styled_run(para, 'If any of these assumptions are not correct, then the scope and fee will change. Based on the above understanding, Kimley-Horn proposes the following scope of services:')
     para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    para.paragraph_format.space_after = Pt(0)
+    para.paragraph_format.space_after = _PT0
     para.paragraph_format.line_spacing = 1.0
     
-    doc.add_paragraph()
+    _append_blank(doc.element.body)
 
 
 def add_scope_of_services(doc, selected_tasks, permits):
@@ -541,48 +594,30 @@ def add_scope_of_services(doc, selected_tasks, permits):
     
     # Section heading - BOLD + CENTERED
     para = doc.add_paragraph()
-    run = para.add_run('Scope of Services')
-    run.font.name = 'Arial'
-    run.font.size = Pt(11)
-    run.font.bold = True  # BOLD
+    _styled_run(para, 'Scope of Services', size=_PT11, bold=True)
     para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    para.paragraph_format.space_after = Pt(0)
+    para.paragraph_format.space_after = _PT0
     para.paragraph_format.line_spacing = 1.0
     
-    doc.add_paragraph()
+    _append_blank(doc.element.body)
     
     para = doc.add_paragraph()
-    run = para.add_run('Kimley-Horn will provide the services specifically set forth below.')
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
+    _styled_run(para, 'Kimley-Horn will provide the services specifically set forth below.')
     para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    para.paragraph_format.space_after = Pt(0)
+    para.paragraph_format.space_after = _PT0
     para.paragraph_format.line_spacing = 1.0
     
-    doc.add_paragraph()
+    _append_blank(doc.element.body)
     
-    sub_section_keywords = ['cover sheet', 'utility plan', 'site layout', 'site plan',
-                           'grading plan', 'drainage plan', 'paving', 'erosion control',
-                           'detail', 'existing conditions', 'demolition']
+    task_descriptions = get_task_descriptions()
+    body = doc.element.body
     
-    for task_num in sorted(selected_tasks.keys()):
-        task = selected_tasks[task_num]
+    for task_num in ORDERED_TASK_NUMS:
+        if task_num not in selected_tasks:
+            continue
         
-        # Special handling for Task 310 - Construction Phase Services
-        if task_num == '310' and 'hours' in task:
-            hours = task['hours']
-            descriptions = []
-            for desc in TASK_DESCRIPTIONS[task_num]:
-                # Replace hour placeholders
-                desc = desc.replace('{shop_drawing_hours}', str(hours['shop_drawing']))
-                desc = desc.replace('{rfi_hours}', str(hours['rfi']))
-                desc = desc.replace('{oac_meetings}', str(hours['oac_meetings']))
-                desc = desc.replace('{site_visits}', str(hours['site_visits']))
-                desc = desc.replace('{record_drawing_hours}', str(hours['record_drawing']))
-                desc = desc.replace('{total_hours}', str(hours['total']))
-                descriptions.append(desc)
         # Special handling for Task 150 - Civil Permitting
-        elif task_num == '150' and permits:
+        if task_num == '150' and permits:
             descriptions = [
                 "Kimley-Horn will prepare and submit on the Client's behalf the civil construction documents to the following agencies:"
             ]
@@ -594,21 +629,12 @@ def add_scope_of_services(doc, selected_tasks, permits):
                 "**BOLD:**Permit fees and impact fees are not included. Kimley-Horn does not guarantee the issuance of permits or approvals."
             ])
         else:
-            descriptions = TASK_DESCRIPTIONS[task_num]
+            descriptions = task_descriptions[task_num]
         
         # Task heading - BOLD + UNDERLINED (no automatic page break)
-        para = doc.add_paragraph()
-        # Removed: para.paragraph_format.page_break_before = True
-        run = para.add_run(f'Task {task_num} – {task["name"].replace("Civil ", "")}')
-        run.font.name = 'Arial'
-        run.font.size = Pt(10)
-        run.font.bold = True
-        run.font.underline = True
-        para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-        para.paragraph_format.space_after = Pt(0)
-        para.paragraph_format.line_spacing = 1.0
+        _fast_para(body, TASK_HEADINGS[task_num], bold=True, underline=True)
         
-        doc.add_paragraph()
+        _append_blank(body)
         
         permit_list_started = False
         
@@ -618,80 +644,50 @@ def add_scope_of_services(doc, selected_tasks, permits):
             
             # Start bullet list after intro
             if task_num == '150' and 'following agencies:' in desc:
-                para = doc.add_paragraph()
-                run = para.add_run(desc)
-                run.font.name = 'Arial'
-                run.font.size = Pt(10)
-                para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-                para.paragraph_format.space_after = Pt(0)
-                para.paragraph_format.line_spacing = 1.0
-                doc.add_paragraph()
+                _fast_para(body, desc)
+                _append_blank(body)
                 permit_list_started = True
                 continue
             
             if is_permit_bullet:
                 # Permit as bullet point - INDENTED
                 para = doc.add_paragraph(style='List Bullet')
-                para.paragraph_format.left_indent = Inches(0.25)  # Indent for clarity
-                run = para.add_run(desc)
-                run.font.name = 'Arial'
-                run.font.size = Pt(10)
+                para.paragraph_format.left_indent = _INDENT_0_25IN  # Indent for clarity
+                _styled_run(para, desc)
                 para.alignment = WD_ALIGN_PARAGRAPH.LEFT
-                para.paragraph_format.space_after = Pt(0)
+                para.paragraph_format.space_after = _PT0
                 para.paragraph_format.line_spacing = 1.0
                 continue
             
             # End permit bullets, back to regular paragraphs
             if permit_list_started and not is_permit_bullet:
                 permit_list_started = False
-                doc.add_paragraph()
+                _append_blank(body)
             
             # Check if bold text
             is_bold_para = desc.startswith('**BOLD:**')
             
-            para = doc.add_paragraph()
-            
             # Check if sub-section heading
-            is_subsection = (len(desc) < 100 and 
-                           any(kw in desc.lower() for kw in sub_section_keywords) and
-                           not desc.endswith('.') and
-                           not desc.startswith('**NOTE:**') and
-                           not desc.startswith('**BOLD:**'))
+            is_subsection = desc.lower() in SUBSECTION_HEADINGS
             
             # Check if it's a note
             is_note = desc.startswith('**NOTE:**')
             
             if is_note:
-                run = para.add_run(desc.replace('**NOTE:**', 'Note:'))
-                run.font.name = 'Arial'
-                run.font.size = Pt(10)
-                run.font.bold = True
-                run.font.italic = True
+                _fast_para(body, desc.replace('**NOTE:**', 'Note:'), bold=True, italic=True)
             elif is_bold_para:
-                run = para.add_run(desc.replace('**BOLD:**', ''))
-                run.font.name = 'Arial'
-                run.font.size = Pt(10)
-                run.font.bold = True
+                _fast_para(body, desc.replace('**BOLD:**', ''), bold=True)
             else:
-                run = para.add_run(desc)
-                run.font.name = 'Arial'
-                run.font.size = Pt(10)
-                
-                if is_subsection:
-                    run.font.underline = True
-            
-            para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-            para.paragraph_format.space_after = Pt(0)
-            para.paragraph_format.line_spacing = 1.0
+                _fast_para(body, desc, underline=is_subsection)
             
             if not is_subsection:
-                doc.add_paragraph()
+                _append_blank(body)
 
 
 def add_scope_table(doc, selected_tasks):
     """Add Scope of Work table."""
     
-    total_fee = sum(task['fee'] for task in selected_tasks.values())
+    total_fee = sum(task.fee for task in selected_tasks.values())
     
     num_rows = len(selected_tasks) + 2
     table = doc.add_table(rows=num_rows, cols=4)
@@ -705,18 +701,21 @@ def add_scope_table(doc, selected_tasks):
     
     for cell in header_cells:
         cell.paragraphs[0].runs[0].font.bold = True
-        cell.paragraphs[0].runs[0].font.size = Pt(10)
+        cell.paragraphs[0].runs[0].font.size = _PT10
         cell.paragraphs[0].runs[0].font.name = 'Arial'
     
-    for idx, (task_num, task) in enumerate(sorted(selected_tasks.items()), start=1):
+    ordered_nums = [task_num for task_num in ORDERED_TASK_NUMS if task_num in selected_tasks]
+    
+    for idx, task_num in enumerate(ordered_nums, start=1):
+        task = selected_tasks[task_num]
         row = table.rows[idx]
         row.cells[0].text = task_num
-        row.cells[1].text = task['name']
-        row.cells[2].text = f'$ {task["fee"]:,}'
-        row.cells[3].text = task['type']
+        row.cells[1].text = task.name
+        row.cells[2].text = f'$ {task.fee:,}'
+        row.cells[3].text = task.type
         
         for cell in row.cells:
-            cell.paragraphs[0].runs[0].font.size = Pt(10)
+            cell.paragraphs[0].runs[0].font.size = _PT10
             cell.paragraphs[0].runs[0].font.name = 'Arial'
     
     total_row = table.rows[-1]
@@ -727,42 +726,106 @@ def add_scope_table(doc, selected_tasks):
     
     for cell in total_row.cells:
         cell.paragraphs[0].runs[0].font.bold = True
-        cell.paragraphs[0].runs[0].font.size = Pt(10)
+        cell.paragraphs[0].runs[0].font.size = _PT10
         cell.paragraphs[0].runs[0].font.name = 'Arial'
     
-    doc.add_paragraph()
+    _append_blank(doc.element.body)
     
-    task_list = ', '.join(sorted(selected_tasks.keys()))
+    task_list = ', '.join(ordered_nums)
     para = doc.add_paragraph()
-    run = para.add_run(f'Kimley-Horn will perform the services in Tasks {task_list} on a labor fee plus expense basis with the maximum labor fee shown above.')
-    run.font.name = 'Arial'
-    run.font.size = Pt(10)
+    _styled_run(para, f'Kimley-Horn will perform the services in Tasks {task_list} on a labor fee plus expense basis with the maximum labor fee shown above.')
     para.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    para.paragraph_format.space_after = Pt(0)
+    para.paragraph_format.space_after = _PT0
     para.paragraph_format.line_spacing = 1.0
 
 
-def generate_proposal_document(client_info, project_info, selected_tasks, assumptions, permits, output_path):
-    """Generate complete proposal document."""
+@st.cache_resource(show_spinner=False)
+def _base_doc_bytes():
+    """Empty proposal with margins, header, footer and letter style, saved once as .docx bytes."""
     
     doc = Document()
     
     section = doc.sections[0]
-    section.top_margin = Inches(1.0)
-    section.bottom_margin = Inches(1.0)
-    section.left_margin = Inches(1.0)
-    section.right_margin = Inches(1.0)
+    section.top_margin = _MARGIN_1IN
+    section.bottom_margin = _MARGIN_1IN
+    section.left_margin = _MARGIN_1IN
+    section.right_margin = _MARGIN_1IN
     
     create_header(section)
     create_footer(section)
     
+    letter_style = doc.styles.add_style(LETTER_STYLE, WD_STYLE_TYPE.PARAGRAPH)
+    letter_style.base_style = doc.styles['Normal']
+    letter_style.font.name = 'Arial'
+    letter_style.font.size = _PT10
+    letter_style.paragraph_format.space_after = _PT0
+    letter_style.paragraph_format.line_spacing = 1.0
+    
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def generate_proposal_document(client_info, project_info, selected_tasks, assumptions, permits, output):
+    """Generate complete proposal document into a writable binary stream."""
+    
+    doc = Document(BytesIO(_base_doc_bytes()))
+    
     add_opening_section(doc, client_info, project_info)
     add_project_understanding(doc, project_info['description'], assumptions)
     add_scope_of_services(doc, selected_tasks, permits)
     add_scope_table(doc, selected_tasks)
     
-    doc.save(output_path)
-    return output_path
+    doc.save(output)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_proposal_bytes(client_info, project_info, selected_tasks, assumptions, permits):
+    """Render the proposal to .docx bytes, memoized on the form inputs."""
+    buffer = BytesIO()
+    generate_proposal_document(client_info, project_info, selected_tasks, assumptions, permits, buffer)
+    return buffer.getvalue()
+
+# ============================================================================
+# FORM STATE HELPERS
+# ============================================================================
+
+# Session-state keys that must be filled before generating, with their labels
+REQUIRED_FIELDS = (
+    ('county', 'County'),
+    ('city', 'City'),
+    ('client_name', 'Client Name'),
+    ('contact_person', 'Contact Person'),
+    ('address_line1', 'Address Line 1'),
+    ('address_line2', 'Address Line 2'),
+    ('project_name', 'Project Name'),
+    ('project_description', 'Project Description')
+)
+
+
+class Task(NamedTuple):
+    """A task selected for the proposal."""
+    name: str
+    fee: int
+    type: str
+    services: Optional[dict] = None     # Task 310 construction-phase service breakdown
+    total_hours: Optional[int] = None   # Task 310 total hours
+
+
+def _current_tasks(fee_type):
+    """Build the selected-task map from the Scope of Services widget state."""
+    default_fees = get_default_fees()
+    tasks = {}
+    for task_num in ORDERED_TASK_NUMS:
+        if not st.session_state.get(f'check_{task_num}'):
+            continue
+        fee = st.session_state.get(f'fee_{task_num}')
+        tasks[task_num] = Task(
+            default_fees[task_num]['name'],
+            fee if fee is not None else default_fees[task_num]['amount'],
+            fee_type
+        )
+    return tasks
 
 # ============================================================================
 # STREAMLIT APP
@@ -965,10 +1028,11 @@ with tab3:
     st.subheader("Scope of Services")
     st.markdown("Select the tasks to include in the proposal and enter the fee for each task.")
     
-    selected_tasks = {}
+    default_fees = get_default_fees()
+    task_extras = {}  # Per-task details entered below the task row (Task 310 services)
     
-    for task_num in sorted(DEFAULT_FEES.keys()):
-        task = DEFAULT_FEES[task_num]
+    for task_num in ORDERED_TASK_NUMS:
+        task = default_fees[task_num]
         
         col_check, col_name, col_fee = st.columns([1, 4, 2])
         
@@ -986,7 +1050,7 @@ with tab3:
                 st.markdown(f"**Task {task_num}: {task['name']}**")
         
         with col_fee:
-            fee_amount = st.number_input(
+            st.number_input(
                 "Fee ($)",
                 min_value=0,
                 value=None,
@@ -997,13 +1061,6 @@ with tab3:
             )
         
         if task_selected:
-            final_fee = fee_amount if fee_amount is not None else task['amount']
-            selected_tasks[task_num] = {
-                'name': task['name'],
-                'fee': final_fee,
-                'type': fee_type
-            }
-            
             # Task 310 - Construction Phase Services selection
             if task_num == '310':
                 st.markdown("**📋 Construction Phase Services:**")
@@ -1110,8 +1167,12 @@ with tab3:
                     key="total_construction_hours"
                 )
                 
-                selected_tasks[task_num]['services'] = service_data
-                selected_tasks[task_num]['total_hours'] = total_hrs
+                task_extras[task_num] = {'services': service_data, 'total_hours': total_hrs}
+    
+    selected_tasks = _current_tasks(fee_type)
+    for task_num, extras in task_extras.items():
+        if task_num in selected_tasks:
+            selected_tasks[task_num] = selected_tasks[task_num]._replace(**extras)
 
 
 
@@ -1148,10 +1209,12 @@ with tab4:
     st.subheader("Selected Tasks Summary")
     if selected_tasks:
         total_fee = 0
-        for task_num in sorted(selected_tasks.keys()):
+        for task_num in ORDERED_TASK_NUMS:
+            if task_num not in selected_tasks:
+                continue
             task = selected_tasks[task_num]
-            st.write(f"✓ Task {task_num}: {task['name']} — **${task['fee']:,}**")
-            total_fee += task['fee']
+            st.write(f"✓ Task {task_num}: {task.name} — **${task.fee:,}**")
+            total_fee += task.fee
         
         st.markdown("---")
         st.markdown(f"### **Total Fee: ${total_fee:,}**")
@@ -1161,59 +1224,54 @@ with tab4:
 
 # TAB 5: Invoice/Billing & Generate
 with tab5:
-    st.subheader("Invoice & Billing Information")
-    col_inv1, col_inv2 = st.columns(2)
-    
-    with col_inv1:
-        invoice_email = st.text_input(
-            "Invoice Email Address",
-            placeholder="e.g., accounting@company.com",
-            help="Primary email for invoices"
-        )
-        kh_signer_name = st.text_input(
-            "Kimley-Horn Signer Name",
-            placeholder="e.g., John Smith, PE"
-        )
-    
-    with col_inv2:
-        invoice_cc_email = st.text_input(
-            "CC Email (optional)",
-            placeholder="e.g., manager@company.com",
-            help="Additional recipient for invoices"
-        )
-        kh_signer_title = st.text_input(
-            "Kimley-Horn Signer Title",
-            placeholder="e.g., Senior Project Manager"
-        )
-    
-    st.markdown("---")
-    st.markdown("---")
-    
-    # Generate Document Section
-    st.subheader("📄 Generate Proposal Document")
-    
-    required_fields = {
-        'County': st.session_state.get('county', ''),
-        'City': st.session_state.get('city', ''),
-        'Client Name': st.session_state.get('client_name', ''),
-        'Contact Person': st.session_state.get('contact_person', ''),
-        'Address Line 1': st.session_state.get('address_line1', ''),
-        'Address Line 2': st.session_state.get('address_line2', ''),
-        'Project Name': st.session_state.get('project_name', ''),
-        'Project Description': st.session_state.get('project_description', '')
-    }
-    
-    missing_fields = [field for field, value in required_fields.items() if not value]
-    
-    if missing_fields:
-        st.warning(f"⚠️ Please fill in: {', '.join(missing_fields)}")
-    
-    if not selected_tasks:
-        st.warning("⚠️ Please select at least one task in the Scope of Services tab")
+    # Billing fields and the generate button only rerun the script on submit
+    with st.form("proposal_form", clear_on_submit=False):
+        st.subheader("Invoice & Billing Information")
+        col_inv1, col_inv2 = st.columns(2)
+        
+        with col_inv1:
+            invoice_email = st.text_input(
+                "Invoice Email Address",
+                placeholder="e.g., accounting@company.com",
+                help="Primary email for invoices"
+            )
+            kh_signer_name = st.text_input(
+                "Kimley-Horn Signer Name",
+                placeholder="e.g., John Smith, PE"
+            )
+        
+        with col_inv2:
+            invoice_cc_email = st.text_input(
+                "CC Email (optional)",
+                placeholder="e.g., manager@company.com",
+                help="Additional recipient for invoices"
+            )
+            kh_signer_title = st.text_input(
+                "Kimley-Horn Signer Title",
+                placeholder="e.g., Senior Project Manager"
+            )
+        
+        st.markdown("---")
+        st.markdown("---")
+        
+        # Generate Document Section
+        st.subheader("📄 Generate Proposal Document")
+        
+        submitted = st.form_submit_button("🚀 Generate Proposal Document", type="primary")
     
-    can_generate = not missing_fields and bool(selected_tasks)
+    can_generate = False
+    if submitted:
+        missing_fields = [label for key, label in REQUIRED_FIELDS if not st.session_state.get(key)]
+        
+        if missing_fields:
+            st.warning(f"⚠️ Please fill in: {', '.join(missing_fields)}")
+        
+        if not selected_tasks:
+            st.warning("⚠️ Please select at least one task in the Scope of Services tab")
+        
+        can_generate = not missing_fields and bool(selected_tasks)
     
-    if st.button("🚀 Generate Proposal Document", type="primary", disabled=not can_generate):
+    if can_generate:
         with st.spinner("Generating proposal document..."):
             try:
                 # Collect assumptions
@@ -1284,13 +1342,7 @@ with tab5:
                     'permits': permits
                 }
                 
-                buffer = BytesIO()
-                temp_path = '/tmp/temp_proposal.docx'
-                generate_proposal_document(client_info, project_info, selected_tasks, assumptions, permits, temp_path)
-                
-                with open(temp_path, 'rb') as f:
-                    buffer.write(f.read())
-                buffer.seek(0)
+                docx_bytes = build_proposal_bytes(client_info, project_info, selected_tasks, assumptions, permits)
                 
                 filename = f"Proposal_{st.session_state.get('project_name', 'Document').replace(' ', '_')[:30]}_{st.session_state.get('proposal_date', date.today()).strftime('%Y%m%d')}.docx"
                 
@@ -1298,7 +1350,7 @@ with tab5:
                 
                 st.download_button(
                     label="📥 Download Word Document",
-                    data=buffer.getvalue(),
+                    data=docx_bytes,
                     file_name=filename,
                     mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                     type="primary",